@@ -24,7 +24,10 @@ def go(args):
     logger.info(f"Fetching artifact {args.input}")
     artifact_local_path = run.use_artifact(args.input).file()
 
-    df = pd.read_csv(artifact_local_path)
+    if artifact_local_path.endswith(".parquet"):
+        df = pd.read_parquet(artifact_local_path)
+    else:
+        df = pd.read_csv(artifact_local_path)
 
     logger.info("Splitting trainval and test")
     trainval, test = train_test_split(
@@ -56,7 +56,7 @@ def go(config: DictConfig):
                 "main",
                 parameters={
                     "input_artifact": "sample.csv:latest",
-                    "output_artifact": "clean_sample.csv",
+                    "output_artifact": "clean_sample.parquet",
                     "output_type": "clean_data",
                     "output_description": "Data with outliers and null values removed",
                     "min_price": config['etl']['min_price'],
@@ -69,7 +69,7 @@ def go(config: DictConfig):
                 os.path.join(hydra.utils.get_original_cwd(), "src", "data_check"),
                 "main",
                 parameters={
-                    "csv": "clean_sample.csv:latest",
+                    "csv": "clean_sample.parquet:latest",
                     "ref": "sample.csv:latest",
                     "kl_threshold": config['data_check']['kl_threshold'],
                     "min_price": config['etl']['min_price'],
@@ -78,12 +78,13 @@ def go(config: DictConfig):
             )
 
         if "data_split" in active_steps:
+            # NOTE: this uses the local copy of the component, which also reads the
+            # Parquet output of basic_cleaning
             _ = mlflow.run(
-                f"{config['main']['components_repository']}/train_val_test_split",
+                os.path.join(hydra.utils.get_original_cwd(), "components", "train_val_test_split"),
                 "main",
-                version='main',
                 parameters={
-                    "input": "clean_sample.csv:latest",
+                    "input": "clean_sample.parquet:latest",
                     "test_size": config['modeling']['test_size'],
                     "random_seed": config['modeling']['random_seed'],
                     "stratify_by": config['modeling']['stratify_by']
@@ -1,7 +1,58 @@
 import torch
+import numpy as np
 import time
 import math
 
+def base_primes_numpy(limit):
+    """Find all primes up to limit with a NumPy sieve on the host, as an int64 array"""
+    sieve = np.ones(limit + 1, dtype=bool)
+    sieve[:2] = False
+    for i in range(2, math.isqrt(limit) + 1):
+        if sieve[i]:
+            sieve[i*i::i] = False
+    return np.flatnonzero(sieve)
+
+def make_sieve_wheel(primes):
+    """
+    Bit-packed odd-only sieve pattern with the multiples of primes cleared
+    
+    Bit i (LSB first) stands for 2*i + 3, as in sieve_of_eratosthenes_gpu,
+    so 3 is bit 0. The pattern repeats every prod(primes) bits, so 8 repeats
+    make a whole number of bytes.
+    """
+    period = math.prod(primes)
+    bits = np.ones(8 * period, dtype=bool)
+    for p in primes:
+        bits[(p - 3) // 2::p] = False
+    return np.packbits(bits, bitorder='little')
+
+# Wheel of the small odd primes, specialised once at import (15015 bytes)
+WHEEL_PRIMES = [3, 5, 7, 11, 13]
+SIEVE_WHEEL = make_sieve_wheel(WHEEL_PRIMES)
+
+def clear_multiples(sieve, start, step):
+    """
+    Clear bits start, start + step, start + 2*step, ... of a bit-packed sieve
+    
+    Eight consecutive multiples advance 8*step bits = step bytes, so the bits
+    fall into 8 strided byte slices, each with a fixed bit position.
+    """
+    for r in range(8):
+        pos = start + r * step
+        sieve[pos >> 3::step].bitwise_and_(~(1 << (pos & 7)) & 0xFF)
+
+def count_bits(sieve):
+    """Count the set bits of a uint8 tensor (SWAR popcount per byte)"""
+    x = sieve - ((sieve >> 1) & 0x55)
+    x = (x & 0x33) + ((x >> 2) & 0x33)
+    x = (x + (x >> 4)) & 0x0F
+    return x.sum(dtype=torch.int64).item()
+
+def unpack_sieve(sieve):
+    """Expand a bit-packed sieve to one bool per bit (LSB first)"""
+    weights = torch.tensor([1 << b for b in range(8)], dtype=torch.uint8, device=sieve.device)
+    return (sieve.unsqueeze(1) & weights).ne(0).flatten()
+
 def sieve_of_eratosthenes_gpu(n, batch_size=10_000_000):
     """
     GPU-accelerated Sieve of Eratosthenes using PyTorch
@@ -16,27 +67,36 @@ def sieve_of_eratosthenes_gpu(n, batch_size=10_000_000):
     
     start_time = time.time()
     
-    # Create sieve on GPU (True = potentially prime)
-    is_prime = torch.ones(n + 1, dtype=torch.bool, device='cuda')
-    is_prime[0] = is_prime[1] = False  # 0 and 1 are not prime
+    # Create a bit-packed, odd-only sieve on GPU: bit i (LSB first) of byte
+    # i // 8 is set while the odd number 2*i + 3 is potentially prime. Tiling
+    # the wheel pattern crosses off the multiples of the wheel primes (the
+    # densest passes) with a single broadcast copy
+    num_odd = max((n - 1) // 2, 0)
+    is_prime = torch.empty(((num_odd + 7) // 8,), dtype=torch.uint8, device='cuda')
+    wheel = torch.from_numpy(SIEVE_WHEEL).to('cuda')
+    full, rest = divmod(len(is_prime), len(wheel))
+    is_prime[:full * len(wheel)].view(full, len(wheel)).copy_(wheel)
+    is_prime[full * len(wheel):].copy_(wheel[:rest])
+    is_prime[:1].bitwise_or_(sum(1 << (p - 3) // 2 for p in WHEEL_PRIMES))  # keep the wheel primes
+    if num_odd % 8:
+        is_prime[-1:].bitwise_and_((1 << (num_odd % 8)) - 1)  # no bits past n
     
-    # Only need to check up to sqrt(n)
-    limit = int(math.sqrt(n)) + 1
+    # Only need to check up to sqrt(n). The base primes come from a small
+    # host-side sieve, so the loop never reads the GPU sieve back (no sync)
+    limit = math.isqrt(n)
+    base_primes = base_primes_numpy(limit)
+    base_primes = base_primes[base_primes > WHEEL_PRIMES[-1]].tolist()
     
     print("Running Sieve of Eratosthenes on GPU...")
     
-    for i in range(2, limit):
-        if i % 10000 == 0:
-            print(f"Progress: {i:,} / {limit:,}")
-        
-        if is_prime[i].item():
-            # Mark all multiples of i as not prime
-            # Use GPU vectorization for speed
-            multiples = torch.arange(i*i, n + 1, i, device='cuda')
-            is_prime[multiples] = False
+    # Even numbers are not stored and the wheel handled the smallest odd
+    # primes. Odd multiples of p are 2p apart in value, p apart in index
+    for p in base_primes:
+        # Mark all multiples of p as not prime with strided byte masks
+        clear_multiples(is_prime, (p*p - 3) // 2, p)
     
-    # Count primes
-    prime_count = is_prime.sum().item()
+    # Count primes (2 is implicit)
+    prime_count = count_bits(is_prime) + (n >= 2)
     
     elapsed = time.time() - start_time
     
@@ -48,12 +108,37 @@ def sieve_of_eratosthenes_gpu(n, batch_size=10_000_000):
     
     return is_prime, prime_count
 
-def get_primes_list(is_prime, max_results=100):
-    """Extract actual prime numbers from sieve (first max_results)"""
-    indices = torch.nonzero(is_prime).squeeze()
-    if len(indices) > max_results:
-        return indices[:max_results].cpu().tolist()
-    return indices.cpu().tolist()
+def get_primes_list(is_prime, n, max_results=100):
+    """Extract actual prime numbers from odd-only sieve up to n (first max_results)"""
+    if n < 2:
+        return []
+    # Only the head of the sieve is copied to the host and unpacked there.
+    # 40 odd candidates per prime wanted is plenty; widen the window if not
+    num_bytes = max_results * 40 // 8
+    while True:
+        head = is_prime[:num_bytes].cpu().numpy()
+        indices = np.flatnonzero(np.unpackbits(head, bitorder='little'))
+        if len(indices) >= max_results - 1 or num_bytes >= len(is_prime):
+            break
+        num_bytes *= 2
+    primes = [2] + (2 * indices[:max_results - 1] + 3).tolist()
+    return primes[:max_results]
+
+def get_last_primes(is_prime, n, count=20):
+    """Extract the last count primes from odd-only sieve up to n, scanning only its tail"""
+    # About 1 in ln(n) numbers is prime (~1 in 10 odd ones near 1e9), so 40
+    # odd candidates per prime wanted is plenty; widen the window if not
+    num_bytes = count * 40 // 8
+    while True:
+        tail_start = max(len(is_prime) - num_bytes, 0)
+        indices = torch.nonzero(unpack_sieve(is_prime[tail_start:])).squeeze(1)
+        if len(indices) >= count or tail_start == 0:
+            break
+        num_bytes *= 2
+    primes = (2 * (indices[-count:] + 8 * tail_start) + 3).cpu().tolist()
+    if len(primes) < count and n >= 2:
+        primes = [2] + primes
+    return primes[-count:]
 
 if __name__ == "__main__":
     # Test with smaller number first
@@ -61,7 +146,7 @@ if __name__ == "__main__":
     is_prime_small, count_small = sieve_of_eratosthenes_gpu(10_000_000)
     
     # Show first 50 primes
-    first_primes = get_primes_list(is_prime_small, 50)
+    first_primes = get_primes_list(is_prime_small, 10_000_000, 50)
     print(f"First 50 primes: {first_primes}\n")
     
     # Now the big one - 1 billion
@@ -73,8 +158,7 @@ if __name__ == "__main__":
     
     # Show some large primes
     print("Last 20 primes found:")
-    all_primes = torch.nonzero(is_prime_big).squeeze()
-    last_primes = all_primes[-20:].cpu().tolist()
+    last_primes = get_last_primes(is_prime_big, 1_000_000_000, 20)
     for p in last_primes:
         print(f"  {p:,}")
     
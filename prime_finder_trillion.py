@@ -1,16 +1,103 @@
 import torch
+import numpy as np
+import numba
+import triton
+import triton.language as tl
 import time
 import math
 
+# Launch shape of sieve_segment: each program clears SIEVE_BLOCK multiples
+# per step, over a chunk of at most SIEVE_CHUNK segment bits. count_segment
+# counts COUNT_BLOCK words per program
+SIEVE_BLOCK = 256
+SIEVE_CHUNK = 1 << 20
+COUNT_BLOCK = 1024
+
+@numba.njit
+def base_primes_numba(limit):
+    """Find all primes up to limit with a Numba sieve on the host, as an int32 array"""
+    sieve = np.ones(limit + 1, dtype=np.bool_)
+    sieve[:2] = False
+    i = 2
+    while i * i <= limit:
+        if sieve[i]:
+            sieve[i*i::i] = False
+        i += 1
+    return np.flatnonzero(sieve).astype(np.int32)
+
+def make_segment_wheel(primes):
+    """
+    make_sieve_wheel from prime_finder_gpu shifted to the segment layout:
+    bit k stands for 2k + 1 (1 is bit 0) instead of 2k + 3
+    """
+    bits = np.ones(8 * math.prod(primes), dtype=bool)
+    for p in primes:
+        bits[(p - 1) // 2::p] = False
+    return np.packbits(bits, bitorder='little')
+
+# Same wheel primes as prime_finder_gpu, in the segment layout
+WHEEL_PRIMES = [3, 5, 7, 11, 13]
+SEGMENT_WHEEL = make_segment_wheel(WHEEL_PRIMES)
+
+def fill_from_wheel(segment, offset, wheel):
+    """
+    Initialise segment with the wheel pattern rotated by offset, i.e.
+    segment[i] = wheel[(offset + i) % len(wheel)], using a handful of copies
+    """
+    size = len(segment)
+    period = len(wheel)
+    head = min(period - offset, size)
+    segment[:head].copy_(wheel[offset:offset + head])
+    full = (size - head) // period
+    if full:
+        # Broadcast the pattern over every complete period in one copy
+        segment[head:head + full * period].view(full, period).copy_(wheel)
+    tail = head + full * period
+    segment[tail:].copy_(wheel[:size - tail])
+
+@triton.jit
+def sieve_segment(seg_ptr, seg_size, primes_ptr, first_ptr, chunk, BLOCK: tl.constexpr):
+    """
+    Clear the multiples of one sieving prime (program axis 0) inside one
+    chunk of the segment (program axis 1). first_ptr holds the bit of each
+    prime's first multiple in the segment, later ones are prime bits apart
+    """
+    p = tl.load(primes_ptr + tl.program_id(0))
+    first = tl.load(first_ptr + tl.program_id(0))
+    lo = tl.program_id(1).to(tl.int64) * chunk
+    hi = tl.minimum(lo + chunk, seg_size)
+    # First multiple at or after the start of the chunk
+    start = first + tl.maximum(lo - first + p - 1, 0) // p * p
+    lanes = tl.arange(0, BLOCK).to(tl.int64) * p
+    for step in range(0, tl.cdiv(hi - start, BLOCK * p)):
+        idx = start + step * BLOCK * p + lanes
+        # The segment is packed into int32 words, shared between lanes and
+        # programs, so bits are cleared atomically
+        bit = (idx & 31).to(tl.int32)
+        tl.atomic_and(seg_ptr + (idx >> 5), ~(1 << bit), mask=idx < hi)
+
+@triton.jit
+def count_segment(seg_ptr, n_words, count_ptr, BLOCK: tl.constexpr):
+    """Add the number of set bits in one block of segment words to count_ptr"""
+    offs = tl.program_id(0).to(tl.int64) * BLOCK + tl.arange(0, BLOCK)
+    x = tl.load(seg_ptr + offs, mask=offs < n_words, other=0).to(tl.uint32, bitcast=True)
+    # SWAR popcount per word
+    x = x - ((x >> 1) & 0x55555555)
+    x = (x & 0x33333333) + ((x >> 2) & 0x33333333)
+    x = (x + (x >> 4)) & 0x0F0F0F0F
+    x = (x * 0x01010101) >> 24
+    tl.atomic_add(count_ptr, tl.sum(x.to(tl.int64), axis=0))
+
 def segmented_sieve_gpu(limit, segment_size=1_000_000_000):
     """
     Segmented Sieve of Eratosthenes for very large numbers
-    Processes in segments to fit in GPU memory
+    Processes in segments to fit in GPU memory. Each segment only stores
+    its odd candidates, one bit each, packed into int32 words
     """
     print(f"Finding primes up to {limit:,} using segmented GPU sieve")
     print(f"GPU: {torch.cuda.get_device_name(0)}")
     print(f"GPU Memory: {torch.cuda.get_device_properties(0).total_memory / 1024**3:.2f} GB")
-    print(f"Segment size: {segment_size:,} ({segment_size / 1024**3:.2f} GB per segment)\n")
+    print(f"Segment size: {segment_size:,} ({segment_size / 16 / 1024**3:.2f} GB per segment)\n")
     
     start_time = time.time()
     
@@ -19,68 +106,147 @@ def segmented_sieve_gpu(limit, segment_size=1_000_000_000):
     print(f"Step 1: Finding base primes up to {sqrt_limit:,}...")
     base_start = time.time()
     
-    base_sieve = torch.ones(sqrt_limit + 1, dtype=torch.bool, device='cuda')
-    base_sieve[0] = base_sieve[1] = False
-    
-    for i in range(2, int(math.sqrt(sqrt_limit)) + 1):
-        if base_sieve[i].item():
-            base_sieve[i*i::i] = False
-    
-    base_primes = torch.nonzero(base_sieve).squeeze().cpu()
+    # A CPU sieve up to ~1e6 takes about a millisecond, then the base primes
+    # are copied once and stay on the GPU (int64) for the per-segment offsets
+    base_primes = torch.from_numpy(base_primes_numba(sqrt_limit)).to('cuda', dtype=torch.int64, non_blocking=True)
     base_time = time.time() - base_start
     print(f"Found {len(base_primes):,} base primes in {base_time:.2f}s\n")
     
+    # Small primes are removed with the precomputed wheel pattern: one copy
+    # per segment instead of one (very dense) strided kernel per prime
+    wheel = torch.from_numpy(SEGMENT_WHEEL).to('cuda')
+    
+    # The remaining base primes are cleared by sieve_segment, two launches
+    # per segment. Dense primes (at least SIEVE_BLOCK hits per chunk) get one
+    # program per (prime, chunk) pair. Sparse primes hit a chunk less than
+    # once per block step, so chunking would mostly launch idle programs:
+    # they get one program per prime over the whole segment
+    sieving_primes = base_primes[base_primes > WHEEL_PRIMES[-1]]
+    two_primes = 2 * sieving_primes
+    max_bits = segment_size // 2 + 8
+    chunk = max(SIEVE_CHUNK, triton.cdiv(max_bits, 65535))
+    num_dense = int((sieving_primes <= chunk // SIEVE_BLOCK).sum())
+    num_sparse = len(sieving_primes) - num_dense
+    dense_primes = sieving_primes[:num_dense]
+    sparse_primes = sieving_primes[num_dense:]
+    
     # Now process in segments
     total_primes = len(base_primes)
     num_segments = (limit - sqrt_limit) // segment_size + 1
     
+    # Segments are sieved on the default stream into one of two buffers that
+    # are allocated once and reused. Counting happens on a second stream, so
+    # counting segment k overlaps sieving segment k + 1. The host only waits
+    # for segment k - 1 to be counted, after segment k has been queued, so
+    # the GPU always has a segment in flight. Every tensor and event the loop
+    # touches is allocated here, so the loop itself allocates no device memory
+    sieve_stream = torch.cuda.current_stream()
+    count_stream = torch.cuda.Stream()
+    buffers = [torch.empty((max_bits + 31) // 32, dtype=torch.int32, device='cuda') for _ in range(2)]
+    first = torch.empty_like(sieving_primes)
+    buffer_free = [torch.cuda.Event(), torch.cuda.Event()]
+    sieved = torch.cuda.Event()
+    
+    # Per-segment counts stay on the GPU. The host reads a segment's count
+    # from pinned memory only after the next segment has been queued
+    seg_counts = torch.zeros(num_segments, dtype=torch.int64, device='cuda')
+    seg_counts_host = torch.empty(num_segments, dtype=torch.int64, pin_memory=True)
+    
     print(f"Step 2: Processing {num_segments} segments of 1 billion numbers each...\n")
     print("="*70)
     
-    for seg_num in range(num_segments):
-        low = sqrt_limit + seg_num * segment_size
-        high = min(low + segment_size - 1, limit)
-        
-        if low > high:
-            break
+    last_report = time.time()
+    
+    for seg_num in range(num_segments + 1):
+        if seg_num < num_segments:
+            low = sqrt_limit + seg_num * segment_size
+            high = min(low + segment_size - 1, limit)
+            
+            # Odd-only, bit-packed segment sieve on GPU, pre-sieved by the
+            # wheel. Bit j stands for the odd number 2 * (base + j) + 1, with
+            # base rounded down to a multiple of 8 so the segment starts on a
+            # wheel byte. The lead bits below low_odd are cleared
+            low_odd = low | 1
+            base = (low_odd // 2) & ~7
+            lead = low_odd // 2 - base
+            num_bits = lead + (high - low_odd) // 2 + 1
+            num_bytes = (num_bits + 7) // 8
+            num_words = (num_bits + 31) // 32
+            segment = buffers[seg_num % 2][:num_words]
+            seg_bytes = segment.view(torch.uint8)
+            
+            # The buffer is reused once segment k - 2 has been counted
+            sieve_stream.wait_event(buffer_free[seg_num % 2])
+            
+            # Index of the first odd multiple of every sieving prime, in one
+            # pass: odd multiples of p are p mod 2p, so the distance from
+            # (odd) 2 * base + 1 is (p - 2 * base - 1) mod 2p, which is even
+            torch.sub(sieving_primes, 2 * base + 1, out=first)
+            first.remainder_(two_primes)
+            first.div_(2, rounding_mode='floor')
+            
+            fill_from_wheel(seg_bytes, (base // 8) % len(wheel), wheel)
+            for p in WHEEL_PRIMES:
+                # Wheel primes above sqrt_limit are not base primes, keep them
+                if sqrt_limit < p and low <= p <= high:
+                    j = p // 2 - base
+                    seg_bytes[j >> 3:(j >> 3) + 1].bitwise_or_(1 << (j & 7))
+            
+            # No bits below low_odd or past high
+            seg_bytes[:1].bitwise_and_(~((1 << lead) - 1) & 0xFF)
+            if num_bits % 8:
+                seg_bytes[num_bytes - 1:num_bytes].bitwise_and_((1 << (num_bits % 8)) - 1)
+            seg_bytes[num_bytes:].zero_()
+            
+            # Mark multiples of the remaining base primes in this segment.
+            # Consecutive odd multiples are 2 * prime apart, i.e. prime apart
+            # in bit space
+            if num_dense and num_bits > 0:
+                grid = (num_dense, triton.cdiv(num_bits, chunk))
+                sieve_segment[grid](segment, num_bits, dense_primes, first, chunk, BLOCK=SIEVE_BLOCK)
+            if num_sparse and num_bits > 0:
+                sieve_segment[(num_sparse, 1)](segment, num_bits, sparse_primes, first[num_dense:], num_bits, BLOCK=SIEVE_BLOCK)
+            
+            # Count primes in this segment on the count stream
+            sieved.record(sieve_stream)
+            with torch.cuda.stream(count_stream):
+                count_stream.wait_event(sieved)
+                if num_words:
+                    grid = (triton.cdiv(num_words, COUNT_BLOCK),)
+                    count_segment[grid](segment, num_words, seg_counts[seg_num:], BLOCK=COUNT_BLOCK)
+                seg_counts_host[seg_num].copy_(seg_counts[seg_num], non_blocking=True)
+                buffer_free[seg_num % 2].record()
         
-        seg_start = time.time()
+        if seg_num == 0:
+            continue
         
-        # Create segment sieve on GPU
+        # Report the previous segment while the current one is on the GPU
+        prev = seg_num - 1
+        buffer_free[prev % 2].synchronize()
+        low = sqrt_limit + prev * segment_size
+        high = min(low + segment_size - 1, limit)
         seg_size = high - low + 1
-        segment = torch.ones(seg_size, dtype=torch.bool, device='cuda')
         
-        # Mark multiples of base primes in this segment
-        for prime in base_primes:
-            prime = prime.item()
-            # Find first multiple of prime in segment
-            start = ((low + prime - 1) // prime) * prime
-            if start < low:
-                start += prime
-            
-            # Mark multiples using GPU vectorization
-            if start <= high:
-                indices = torch.arange(start - low, seg_size, prime, device='cuda')
-                segment[indices] = False
-        
-        # Count primes in this segment
-        seg_prime_count = segment.sum().item()
+        seg_prime_count = int(seg_counts_host[prev])
         total_primes += seg_prime_count
-        seg_time = time.time() - seg_start
+        now = time.time()
+        seg_time = now - last_report
+        last_report = now
         
-        elapsed = time.time() - start_time
+        elapsed = now - start_time
         progress_pct = ((high / limit) * 100)
         rate = high / elapsed
         eta = (limit - high) / rate if rate > 0 else 0
         
-        print(f"Segment {seg_num + 1}/{num_segments} [{low:,} - {high:,}]")
+        print(f"Segment {prev + 1}/{num_segments} [{low:,} - {high:,}]")
         print(f"  ✓ Primes found: {seg_prime_count:,} | Total: {total_primes:,}")
         print(f"  ⏱️  Segment time: {seg_time:.2f}s | Speed: {seg_size/seg_time:,.0f} nums/sec")
         print(f"  📊 Progress: {progress_pct:.1f}% | Elapsed: {elapsed:.1f}s | ETA: {eta:.1f}s")
         print("-"*70)
-        
-        del segment
-        torch.cuda.empty_cache()
+    
+    # The only blocking read of the GPU-side counts
+    sieve_stream.wait_stream(count_stream)
+    total_primes = len(base_primes) + seg_counts.sum().item()
     
     total_time = time.time() - start_time
     
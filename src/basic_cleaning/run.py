@@ -5,7 +5,8 @@ Download from W&B the raw dataset and apply some basic data cleaning, exporting
 import argparse
 import logging
 import wandb
-import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
 
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)-15s %(message)s")
@@ -20,34 +21,56 @@ def go(args):
     # Download input artifact. This will also log that this script is using this
     logger.info("Downloading artifact")
     artifact_local_path = run.use_artifact(args.input_artifact).file()
-    df = pd.read_csv(artifact_local_path)
+    
+    # Parse with pyarrow's multi-threaded CSV reader. Numeric columns get
+    # narrow types and last_review is parsed as a timestamp by the reader
+    table = pacsv.read_csv(
+        artifact_local_path,
+        read_options=pacsv.ReadOptions(use_threads=True),
+        convert_options=pacsv.ConvertOptions(
+            timestamp_parsers=["%Y-%m-%d"],
+            column_types={
+                "price": pa.float32(),
+                "minimum_nights": pa.int32(),
+                "number_of_reviews": pa.int32(),
+                "availability_365": pa.int16(),
+                "longitude": pa.float32(),
+                "latitude": pa.float32(),
+                "last_review": pa.timestamp("s"),
+            },
+        ),
+    )
+    df = table.to_pandas(split_blocks=True, self_destruct=True)
+    del table
     
     logger.info(f"Original dataset shape: {df.shape}")
     
-    # Drop outliers
+    # All filters are combined into one mask so the frame is copied only once
     min_price = args.min_price
     max_price = args.max_price
     logger.info(f"Filtering prices between ${min_price} and ${max_price}")
-    idx = df['price'].between(min_price, max_price)
-    df = df[idx].copy()
-    
-    # Filter out listings with minimum_nights > 365 (long-term leases, not short-term rentals)
     logger.info("Filtering out long-term leases (minimum_nights > 365)")
-    df = df[df['minimum_nights'] <= 365].copy()
-    
-    # Convert last_review to datetime
-    df['last_review'] = pd.to_datetime(df['last_review'])
-
-    # Filter by geolocation (NYC bounds)
     logger.info("Filtering by NYC geographic bounds")
-    idx = df['longitude'].between(-74.25, -73.50) & df['latitude'].between(40.5, 41.2)
-    df = df[idx].copy()
+    mask = (
+        # Drop outliers
+        df['price'].between(min_price, max_price)
+        # Long-term leases, not short-term rentals
+        & (df['minimum_nights'] <= 365)
+        # NYC bounds
+        & df['longitude'].between(-74.25, -73.50)
+        & df['latitude'].between(40.5, 41.2)
+    )
+    df = df.loc[mask].copy()
+    
+    # Store the (low cardinality) neighbourhood group as categorical, which
+    # Parquet preserves, so downstream checks can work on the categories
+    df['neighbourhood_group'] = df['neighbourhood_group'].astype('category')
     
     logger.info(f"Cleaned dataset shape: {df.shape}")
     
-    # Save the cleaned file
-    filename = "clean_sample.csv"
-    df.to_csv(filename, index=False)
+    # Save the cleaned file as Parquet: smaller, faster to write and keeps the dtypes
+    filename = "clean_sample.parquet"
+    df.to_parquet(filename, engine="pyarrow", compression="snappy", index=False)
 
     # Log the new data
     logger.info("Logging artifact to W&B")
@@ -22,7 +22,7 @@ def data(request):
     if data_path is None:
         pytest.fail("You must provide the --csv option on the command line")
 
-    df = pd.read_csv(data_path)
+    df = pd.read_parquet(data_path)
 
     return df
 